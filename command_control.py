@@ -12,7 +12,7 @@ from nozzle_geometry import exit_area_relation, C_F_from_geometry
 def expansion_ratio(pe_p0, pa_p0, rtol=0.02):
     # Compare exit pressure to ambient pressure.
     if rtol < 0:
-        raise ValueError("rtol must be >= 0.02")
+        raise ValueError("rtol must be >= 0. Iterate and re-run.")
     
     denominator = max(abs(pa_p0), 1e-15)
     relative_error = abs(pe_p0 - pa_p0) / denominator
@@ -45,8 +45,8 @@ def main():
     parser.add_argument("--rtol", type=float, default=0.02, help="Relative tolerance for ideal expansion check.")
     args = parser.parse_args()
 
-    exit_conditions = exit_area_relation (args.Ae_At, args.gamma, branch=args.branch)
-    C_F = C_F_from_geometry(args.gamma, args.Ae_At, args.pa_p0, branch=args.branch)
+    exit_conditions = exit_area_relation(args.Ae_At, args.gamma, branch=args.branch)
+    C_F = C_F_from_geometry(args.gamma, args.Ae_At, args.pa_p0, branch=args.branch, exit_conditions=exit_conditions)
     expans, note = expansion_ratio(exit_conditions["pe_p0"], args.pa_p0, rtol=args.rtol)
     warning = C_F_warning(C_F)
 
@@ -56,14 +56,14 @@ def main():
     print(f"pe/p0 = {exit_conditions['pe_p0']:.10g}")
     print(f"Te/T0 = {exit_conditions['Te_T0']:.10g}")
 
-    print("Analysis")
+    print("\nAnalysis")
     print(f"Regime = {expans}")
     print(f"Note = {note}")
 
     print("\nPerformance")
     print(f"C_F = {C_F:.10g}")
-    if note:
-    	print(note)
+    if warning:
+        print(warning)
 
     print()
 
@@ -9,57 +9,87 @@ The flow of code is as follows:
 - Convert nozzle geometry Ae/A* into exit Mach number Me.
 - Then convert Mach number -> pressure ratio pe/p0 and temperature ratio Te/T0.
 
+The relations here accept NumPy arrays. Scalars are passed to the math-only versions in flow_relations_core.py,
+which also holds the Mach solver.
+
 The numerical method used in this code:
-- Bisection method to solve Mach from the area-Mach relation.
+- Newton's method with a fixed-point/Illinois safeguard to solve Mach from the area-Mach relation.
+- The solver loop runs as plain Python, and flow_relations_core.use_numba() compiles it with Numba for long sweeps.
 """
 
 import numpy as np
 
+import flow_relations_core
+from flow_relations_core import (gamma_constants, mach_area_relation,)
+
 def area_ratio_relation(Mach_number, gamma):
     # A/A* = (1/M)*[(2/(gamma+1))*(1+(gamma-1)/2*M^2)]^((gamma+1)/(2(gamma-1)))
+    # Scalar fast path: plain float math, no ndarray construction.
+    if isinstance(Mach_number, (int, float)):
+        return flow_relations_core.area_ratio_relation(Mach_number, gamma)
+
     if gamma <= 1:
         raise ValueError("gamma must be > 1. Iterate and re-run.")
-    if np.any(np.asarray(Mach_number) <= 0):
-        raise ValueError("Mach number M must be > 0. Iterate and re-run.")
 
+    constants = gamma_constants(gamma)
     Mach_number = np.asarray(Mach_number, dtype=float)
-    mach_term_first = 2/(gamma+1)
-    mach_term_second = 1+(gamma-1)*0.5*Mach_number**2
-    mach_exponent_first = (gamma+1)/(2*(gamma-1))
-    return (1/Mach_number)*(mach_term_first*mach_term_second)**mach_exponent_first
+    if np.any(Mach_number <= 0):
+        raise ValueError("Mach number M must be > 0. Iterate and re-run.")
+    mach_term_second = 1+constants.half_gm1*Mach_number**2
+    return (1/Mach_number)*(constants.area_base*mach_term_second)**constants.exp_area
 
 def pressure_mach_relation(Mach_number, gamma):
     # p/p0 = [1+(gamma-1)/2*Mach_number^2]^(-gamma/(gamma-1))
+    # Scalar fast path: plain float math, no ndarray construction.
+    if isinstance(Mach_number, (int, float)):
+        return flow_relations_core.pressure_mach_relation(Mach_number, gamma)
 
     if gamma <= 1:
         raise ValueError("gamma must be > 1. Iterate and re-run.")
-    if np.any(np.asarray(Mach_number) < 0):
-        raise ValueError("Mach number M must be >= 0. Iterate and re-run.")
 
+    constants = gamma_constants(gamma)
     Mach_number = np.asarray(Mach_number, dtype=float)
-    return (1+(gamma-1)*0.5*Mach_number**2)**(-gamma/(gamma-1))
+    if np.any(Mach_number < 0):
+        raise ValueError("Mach number M must be >= 0. Iterate and re-run.")
+    return (1+constants.half_gm1*Mach_number**2)**constants.exp_press
 
 def temperature_mach_relation(Mach_number, gamma):
     # T/T0 = [1+(gamma-1)/2*M^2]^(-1)
+    # Scalar fast path: plain float math, no ndarray construction.
+    if isinstance(Mach_number, (int, float)):
+        return flow_relations_core.temperature_mach_relation(Mach_number, gamma)
 
     if gamma <= 1:
         raise ValueError("gamma must be > 1. Iterate and re-run.")
-    if np.any(np.asarray(Mach_number) < 0):
-        raise ValueError("Mach number M must be >= 0. Iterate and re-run.")
 
+    half_gm1 = gamma_constants(gamma).half_gm1
     Mach_number = np.asarray(Mach_number, dtype=float)
-    return (1+(gamma-1)*0.5*Mach_number**2)**(-1)
+    if np.any(Mach_number < 0):
+        raise ValueError("Mach number M must be >= 0. Iterate and re-run.")
+    return (1+half_gm1*Mach_number**2)**(-1)
 
-def mach_area_relation(A_Astar, gamma, branch="Supersonic", tol=1e-10, max_iter=200):
+def mach_area_relation_batch(A_Astar, gamma, branch="Supersonic", tol=None, max_iter=200, xp=None, dtype="float32"):
     """
-    Solve for Mach number M given A/A* using bisection.
-    To get the Mach number, inverting the area/mach relation is necessary.
-    tol : float - Bisection stops when bracket size is smaller than tol.
-    max_iter : int - Maximum bisection iterations.
+    Solve for Mach number M given A/A* for whole arrays at once using bisection.
+    A_Astar and gamma are broadcast against each other, so a grid of cases is solved in one vectorized pass.
+    Each pass halves every bracket, so about log2(bracket/(tol*M)) passes are needed.
+    tol : float - Solver stops when every bracket is smaller than tol relative to its upper end, or cannot be split
+                  in dtype. Relative, so small subsonic Mach numbers at large A/A* keep their significant figures.
+                  Defaults to 1e-5 in single precision and 1e-10 in double precision.
+    max_iter : int - Maximum bisection passes.
+    xp : module - Array module to run on, NumPy by default. Passing cupy runs the same passes on the GPU.
+    dtype : str - Floating type of every array in the solve. float32 halves memory traffic and is accurate to
+                  about 1e-5, which is enough for sweeps. Use float64 for 10 significant figures.
     """
-    if gamma <= 1:
+    if xp is None:
+        xp = np
+    if tol is None:
+        tol = 1e-10 if xp.finfo(dtype).bits >= 64 else 1e-5
+    A_Astar, gamma = xp.broadcast_arrays(xp.asarray(A_Astar, dtype=dtype), xp.asarray(gamma, dtype=dtype))
+
+    if xp.any(gamma <= 1):
         raise ValueError("gamma must be > 1. Iterate and re-run.")
-    if A_Astar < 1:
+    if xp.any(A_Astar < 1):
         raise ValueError("A/A* must be >= 1. Iterate and re-run.")
     if branch not in ["Subsonic", "Supersonic"]:
         raise ValueError("branch must be 'Subsonic' or 'Supersonic'. Iterate and re-run.")
@@ -68,54 +98,55 @@ def mach_area_relation(A_Astar, gamma, branch="Supersonic", tol=1e-10, max_iter=
     if max_iter < 1:
         raise ValueError("max_iter must be >= 1. Iterate and re-run.")
 
-    # This is only for if at the throat, A/A* = 1 exactly and M = 1.
-    if abs(A_Astar - 1) < 1e-14:
-        return 1
+    half_gamma_minus_one = 0.5*(gamma-1)
+    area_base = 2/(gamma+1)
+    area_exponent = (gamma+1)/(2*(gamma-1))
 
-    # Define f(M) = area_ratio_relation(M)-goal so that f(M) = 0.
+    # f(M) = ln(A(M)/goal), the same log residual as mach_area_relation. It has the sign of A-goal and does not
+    # overflow when gamma is close to 1.
+    log_A_Astar = xp.log(A_Astar)
     def f(Mach_number):
-        return float(area_ratio_relation(Mach_number, gamma)-A_Astar)
+        return area_exponent*xp.log(area_base*(1+half_gamma_minus_one*Mach_number**2))-xp.log(Mach_number)-log_A_Astar
 
-    # Ensure that f(lower_mach_boudary) and f(higher_mach_boundary) have opposite signs.
-    # That ensures that a root exists in the interval.
+    # Same brackets as mach_area_relation, with the analytic supersonic upper bound for every element.
     if branch == "Subsonic":
-        lower_mach_boudary = 1e-12
-        higher_mach_boundary = 1 - 1e-12
+        lower_mach_boudary = xp.full_like(A_Astar, 1e-12)
+        higher_mach_boundary = xp.full_like(A_Astar, 1-1e-12)
     else:
-        lower_mach_boudary = 1+1e-12
-        higher_mach_boundary = 50
-
+        lower_mach_boudary = xp.full_like(A_Astar, 1+1e-12)
+        higher_mach_boundary = xp.exp((log_A_Astar-area_exponent*xp.log((gamma-1)/(gamma+1)))/(2*area_exponent-1))
     f_lower_mach_boudary = f(lower_mach_boudary)
-    f_higher_mach_boundary = f(higher_mach_boundary)
 
-    # If Supersonic bracket fails, expand the higher_mach_boundary so that it will bracket correctly.
-    if branch == "Supersonic" and f_lower_mach_boudary*f_higher_mach_boundary > 0:
-        for _ in range(20):
-            higher_mach_boundary *= 2
-            f_higher_mach_boundary = f(higher_mach_boundary)
-            if f_lower_mach_boudary * f_higher_mach_boundary <= 0:
-                break
-        else:
-            raise RuntimeError("Could not bracket root. Try larger higher_mach_boundary value. Iterate and re-run.")
-
-    if branch == "Subsonic" and f_lower_mach_boudary*f_higher_mach_boundary > 0:
+    # Every bracket must contain a root, as in mach_area_relation. The throat is returned as M = 1 below.
+    at_throat = xp.abs(A_Astar-1) < 1e-14
+    f_higher_mach_boundary = f(higher_mach_boundary)
+    no_root = (f_lower_mach_boudary*f_higher_mach_boundary > 0) & ~at_throat
+    if branch == "Subsonic" and xp.any(no_root):
         raise RuntimeError("Could not bracket Subsonic root. Iterate and re-run.")
 
-    # This is the bisection solver loop.
+    # If rounding defeats the analytic bound, double the higher_mach_boundary of those elements until they bracket.
+    for _ in range(20):
+        if not xp.any(no_root):
+            break
+        higher_mach_boundary = xp.where(no_root, 2*higher_mach_boundary, higher_mach_boundary)
+        f_higher_mach_boundary = f(higher_mach_boundary)
+        no_root = (f_lower_mach_boudary*f_higher_mach_boundary > 0) & ~at_throat
+    else:
+        raise RuntimeError("Could not bracket root. Try larger higher_mach_boundary value. Iterate and re-run.")
+
+    # Each pass halves every bracket, with xp.where selecting the half that keeps the sign change.
     for _ in range(max_iter):
         middle_mach = 0.5*(lower_mach_boudary+higher_mach_boundary)
-        f_middle_mach = f(middle_mach)
+        # A bracket one ulp wide cannot be split further, so it counts as converged too.
+        converged = (higher_mach_boundary-lower_mach_boudary < tol*higher_mach_boundary) | (middle_mach == lower_mach_boudary) | (middle_mach == higher_mach_boundary)
+        if xp.all(converged):
+            # At the throat (A/A* = 1) the answer is M = 1 on both branches, the same rule as mach_area_relation.
+            return xp.where(at_throat, xp.asarray(1, dtype=dtype), middle_mach)
 
-        # Once the interval is small enough, the solver will halt.
-        if abs(higher_mach_boundary-lower_mach_boudary) < tol:
-            return middle_mach
-
-        # Half-root solver
-        if f_lower_mach_boudary*f_middle_mach <= 0:
-            higher_mach_boundary = middle_mach
-            f_higher_mach_boundary = f_middle_mach
-        else:
-            lower_mach_boudary = middle_mach
-            f_lower_mach_boudary = f_middle_mach
+        f_middle_mach = f(middle_mach)
+        root_in_lower_half = f_lower_mach_boudary*f_middle_mach <= 0
+        higher_mach_boundary = xp.where(root_in_lower_half, middle_mach, higher_mach_boundary)
+        lower_mach_boudary = xp.where(root_in_lower_half, lower_mach_boudary, middle_mach)
+        f_lower_mach_boudary = xp.where(root_in_lower_half, f_lower_mach_boudary, f_middle_mach)
 
-    raise RuntimeError("Bisection did not converge within max_iter. Iterate and re-run.")
\ No newline at end of file
+    raise RuntimeError("Bisection did not converge within max_iter. Iterate and re-run.")
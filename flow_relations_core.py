@@ -0,0 +1,331 @@
+"""
+This file holds the scalar, math-only part of the isentropic flow relations in flow_relations.py.
+It has no NumPy import, so the command line tool can start without loading NumPy.
+The flow of code is as follows:
+- Precompute the gamma-derived constants once per gamma.
+- Convert nozzle geometry Ae/A* into exit Mach number Me for one float at a time.
+
+The numerical method used in this code:
+- Newton's method with a fixed-point/Illinois safeguard to solve Mach from the area-Mach relation.
+- The solver loop runs as plain Python, and use_numba() compiles it with Numba for long sweeps.
+"""
+
+import functools
+import math
+import sys
+from collections import namedtuple
+
+def area_ratio_relation(Mach_number, gamma):
+    # A/A* = (1/M)*[(2/(gamma+1))*(1+(gamma-1)/2*M^2)]^((gamma+1)/(2(gamma-1))) for one float.
+    if gamma <= 1:
+        raise ValueError("gamma must be > 1. Iterate and re-run.")
+    if Mach_number <= 0:
+        raise ValueError("Mach number M must be > 0. Iterate and re-run.")
+    log_area = _log_area_ratio(float(Mach_number), gamma_constants(gamma))
+    # A/A* is past the float range for large M when gamma is close to 1.
+    if log_area > _LOG_FLOAT_MAX:
+        return math.inf
+    return math.exp(log_area)
+
+def pressure_mach_relation(Mach_number, gamma):
+    # p/p0 = [1+(gamma-1)/2*Mach_number^2]^(-gamma/(gamma-1)) for one float.
+    if gamma <= 1:
+        raise ValueError("gamma must be > 1. Iterate and re-run.")
+    if Mach_number < 0:
+        raise ValueError("Mach number M must be >= 0. Iterate and re-run.")
+
+    constants = gamma_constants(gamma)
+    return math.pow(1+constants.half_gm1*Mach_number*Mach_number, constants.exp_press)
+
+def temperature_mach_relation(Mach_number, gamma):
+    # T/T0 = [1+(gamma-1)/2*M^2]^(-1) for one float.
+    if gamma <= 1:
+        raise ValueError("gamma must be > 1. Iterate and re-run.")
+    if Mach_number < 0:
+        raise ValueError("Mach number M must be >= 0. Iterate and re-run.")
+
+    return 1/(1+gamma_constants(gamma).half_gm1*Mach_number*Mach_number)
+
+# Largest ln(A/A*) that still fits in a float.
+_LOG_FLOAT_MAX = math.log(sys.float_info.max)
+
+# Solver kernels that use_numba() compiles, leaf functions first.
+_KERNEL_NAMES = (
+    "_log_area_ratio", "_log_area_and_slope", "_fixed_point_step", "_shrink_bracket", "_mach_from_area_njit",
+)
+_numba_enabled = False
+
+# Last (gamma, converged Mach number) per branch, used to warm-start the next solve.
+# Keyed on branch only so it holds two entries however many gamma values a sweep visits.
+_last_M_by_branch = {}
+
+# Gamma-derived constants shared by the area, pressure and thrust relations.
+GammaConstants = namedtuple(
+    "GammaConstants",
+    ["gamma", "gm1", "gp1", "half_gm1", "area_base", "exp_area", "exp_press", "exp_thrust", "coeff_thrust"],
+)
+
+@functools.lru_cache(maxsize=64)
+def gamma_constants(gamma):
+    # Build the GammaConstants for one gamma so each exponent and coefficient is computed only once.
+    if gamma <= 1:
+        raise ValueError("gamma must be > 1. Iterate and re-run.")
+
+    gamma = float(gamma)
+    gm1 = gamma-1
+    gp1 = gamma+1
+    return GammaConstants(
+        gamma=gamma,
+        gm1=gm1,
+        gp1=gp1,
+        half_gm1=0.5*gm1,
+        area_base=2/gp1,
+        exp_area=gp1/(2*gm1),
+        exp_press=-gamma/gm1,
+        exp_thrust=gm1/gamma,
+        coeff_thrust=(2*gamma*gamma/gm1)*(2/gp1)**(gp1/gm1),
+    )
+
+def _log_area_ratio(Mach_number, constants):
+    # ln(A/A*) = n*ln(c*t)-ln(M) for one float with no checks, using the precomputed gamma constants.
+    # Kept in logs because n = (gamma+1)/(2(gamma-1)) is large for gamma close to 1 and A/A* itself overflows.
+    # For huge M, t = 1+(gamma-1)/2*M^2 itself overflows, so c*t is taken as M^2*c*((gamma-1)/2+1/M^2).
+    if Mach_number < 1e100:
+        t = 1.0+constants.half_gm1*Mach_number*Mach_number
+        return constants.exp_area*math.log(constants.area_base*t)-math.log(Mach_number)
+    log_mach = math.log(Mach_number)
+    return constants.exp_area*(2.0*log_mach+math.log(constants.area_base*(constants.half_gm1+1.0/(Mach_number*Mach_number))))-log_mach
+
+def _log_area_and_slope(Mach_number, constants):
+    # ln(A/A*) and its slope at a scalar Mach number, used by the Newton solver.
+    # d ln(A/A*)/dM = n*(gamma-1)*M/t - 1/M, t = 1+(gamma-1)/2*M^2, n = (gamma+1)/(2(gamma-1))
+    # The first slope term is rewritten as 2n/(1/((gamma-1)/2*M)+M) so it does not overflow for huge M.
+    n = constants.exp_area
+    if Mach_number < 1e100:
+        t = 1.0+constants.half_gm1*Mach_number*Mach_number
+        log_area = n*math.log(constants.area_base*t)-math.log(Mach_number)
+    else:
+        log_area = _log_area_ratio(Mach_number, constants)
+    slope = 2.0*n/(1.0/(constants.half_gm1*Mach_number)+Mach_number)-1.0/Mach_number
+    return log_area, slope
+
+def _fixed_point_step(Mach_number, A_Astar, constants, supersonic):
+    # One fixed-point update of the area-Mach relation and its contraction estimate delta = |g'(M)|.
+    # Supersonic: M = sqrt((2/(gamma-1))*((A*M)^(1/n)/c-1)), delta = (1+2/((gamma-1)*M^2))/(2n)
+    # Subsonic:   M = (c*t)^n/A,                            delta = n*(gamma-1)*M^2/t
+    c = constants.area_base
+    n = constants.exp_area
+    if supersonic:
+        k = 1.0/constants.half_gm1
+        next_mach = math.sqrt(k*(math.pow(A_Astar*Mach_number, 1.0/n)/c-1.0))
+        delta = (1.0+k/(Mach_number*Mach_number))/(2.0*n)
+    else:
+        t = 1.0+constants.half_gm1*Mach_number*Mach_number
+        next_mach = math.pow(c*t, n)/A_Astar
+        delta = n*constants.gm1*Mach_number*Mach_number/t
+    return next_mach, delta
+
+def _shrink_bracket(lower_mach_boudary, g_lower_mach_boudary, higher_mach_boundary, g_higher_mach_boundary, kept_side, mach, g_mach):
+    # Replace the bracket end that has the same sign as g(mach) = ln(A(mach)/goal), which has the sign of f.
+    # kept_side is -1 (lower) or +1 (higher) for the end that stayed fixed last time. If the same end stays
+    # fixed twice in a row, its g is halved (Illinois) so the next false-position step moves it.
+    # The update is written as arithmetic selection with 0/1 weights instead of if/else. Which end moves is
+    # close to a coin flip, and the compiled loop turns this into conditional moves with no branch to mispredict.
+    take_higher = 1.0 if g_lower_mach_boudary*g_mach <= 0 else 0.0
+    keep_higher = 1.0-take_higher
+
+    higher_mach_boundary = take_higher*mach+keep_higher*higher_mach_boundary
+    g_higher_mach_boundary = take_higher*g_mach+keep_higher*g_higher_mach_boundary
+    lower_mach_boudary = keep_higher*mach+take_higher*lower_mach_boudary
+    g_lower_mach_boudary = keep_higher*g_mach+take_higher*g_lower_mach_boudary
+
+    halve_lower = take_higher*(1.0 if kept_side == -1 else 0.0)
+    halve_higher = keep_higher*(1.0 if kept_side == 1 else 0.0)
+    g_lower_mach_boudary *= 1.0-0.5*halve_lower
+    g_higher_mach_boundary *= 1.0-0.5*halve_higher
+    kept_side = 1-2*int(take_higher)
+    return lower_mach_boudary, g_lower_mach_boudary, higher_mach_boundary, g_higher_mach_boundary, kept_side
+
+def _mach_from_area_njit(A_Astar, constants, supersonic, lower_mach_boudary, higher_mach_boundary, middle_mach, tol, max_iter):
+    # Newton solver loop on a bracket already checked by mach_area_relation.
+    # A rejected Newton step falls back to a fixed-point step when it contracts (delta < 1/2),
+    # else to an Illinois false-position step, else to bisection.
+    # The residual is g = ln(A/goal) rather than f = A-goal. g is close to linear in M away from the throat,
+    # so false position on g is not stalled by A/A* growing like M^(2n-1), and g cannot overflow for gamma near 1.
+    # Returns (Mach, converged) so the caller can raise the error message.
+    log_A_Astar = math.log(A_Astar)
+    g_lower_mach_boudary = _log_area_ratio(lower_mach_boudary, constants)-log_A_Astar
+    g_higher_mach_boundary = _log_area_ratio(higher_mach_boundary, constants)-log_A_Astar
+    g_middle_mach = _log_area_ratio(middle_mach, constants)-log_A_Astar
+    kept_side = 0
+
+    for _ in range(max_iter):
+        # Shrink the bracket around the root with the newest point.
+        lower_mach_boudary, g_lower_mach_boudary, higher_mach_boundary, g_higher_mach_boundary, kept_side = _shrink_bracket(
+            lower_mach_boudary, g_lower_mach_boudary, higher_mach_boundary, g_higher_mach_boundary, kept_side, middle_mach, g_middle_mach
+        )
+
+        _, slope = _log_area_and_slope(middle_mach, constants)
+        # A flat slope gives no Newton step, so mark it as outside the bracket.
+        newton_mach = middle_mach-g_middle_mach/slope if slope != 0 else -1.0
+
+        # Take the Newton step only if it stays inside the bracket and reduces |g|.
+        newton_accepted = False
+        if lower_mach_boudary <= newton_mach <= higher_mach_boundary:
+            g_next_mach = _log_area_ratio(newton_mach, constants)-log_A_Astar
+            if abs(g_next_mach) <= abs(g_middle_mach):
+                next_mach = newton_mach
+                step = abs(newton_mach-middle_mach)
+                newton_accepted = True
+            else:
+                # Keep the rejected point to shrink the bracket.
+                lower_mach_boudary, g_lower_mach_boudary, higher_mach_boundary, g_higher_mach_boundary, kept_side = _shrink_bracket(
+                    lower_mach_boudary, g_lower_mach_boudary, higher_mach_boundary, g_higher_mach_boundary, kept_side, newton_mach, g_next_mach
+                )
+
+        if not newton_accepted:
+            fixed_mach, delta = _fixed_point_step(middle_mach, A_Astar, constants, supersonic)
+            if delta < 0.5 and lower_mach_boudary <= fixed_mach <= higher_mach_boundary:
+                next_mach = fixed_mach
+                step = abs(fixed_mach-middle_mach)
+            else:
+                # Illinois false-position step on the bracket's log values.
+                next_mach = (lower_mach_boudary*g_higher_mach_boundary-higher_mach_boundary*g_lower_mach_boudary)/(g_higher_mach_boundary-g_lower_mach_boudary)
+                if lower_mach_boudary <= next_mach <= higher_mach_boundary:
+                    step = abs(next_mach-middle_mach)
+                else:
+                    next_mach = 0.5*(lower_mach_boudary+higher_mach_boundary)
+                    step = abs(higher_mach_boundary-lower_mach_boudary)
+            g_next_mach = _log_area_ratio(next_mach, constants)-log_A_Astar
+
+        middle_mach = next_mach
+        g_middle_mach = g_next_mach
+
+        # Once the step or the interval is small enough, the solver will halt.
+        if step < tol or abs(higher_mach_boundary-lower_mach_boudary) < tol or g_middle_mach == 0:
+            return middle_mach, True
+
+    return middle_mach, False
+
+def mach_area_relation(A_Astar, gamma, branch="Supersonic", tol=1e-10, max_iter=200, M_guess=None):
+    """
+    Solve for Mach number M given A/A* using Newton's method on a guaranteed bracket.
+    To get the Mach number, inverting the area/mach relation is necessary.
+    Newton steps work on f = ln(A/goal) with its analytic slope. A step that leaves the bracket or does not reduce |f| is replaced by a
+    fixed-point step when that iteration contracts (delta < 1/2), otherwise by an Illinois false-position step.
+    tol : float - Solver stops when the step or bracket size is smaller than tol.
+    max_iter : int - Maximum solver iterations.
+    M_guess : float - Optional starting Mach number for Newton, for example from a lookup table.
+    """
+    if gamma <= 1:
+        raise ValueError("gamma must be > 1. Iterate and re-run.")
+    if A_Astar < 1:
+        raise ValueError("A/A* must be >= 1. Iterate and re-run.")
+    if branch not in ["Subsonic", "Supersonic"]:
+        raise ValueError("branch must be 'Subsonic' or 'Supersonic'. Iterate and re-run.")
+    if tol <= 0:
+        raise ValueError("tol must be > 0. Iterate and re-run.")
+    if max_iter < 1:
+        raise ValueError("max_iter must be >= 1. Iterate and re-run.")
+
+    # This is only for if at the throat, A/A* = 1 exactly and M = 1.
+    if abs(A_Astar - 1) < 1e-14:
+        return 1
+
+    # Define f(M) = ln(area_ratio_relation(M)/goal) so that f(M) = 0. It has the sign of A-goal and does not
+    # overflow when gamma is close to 1. Inputs are already checked, so f(M) skips the validation in area_ratio_relation.
+    constants = gamma_constants(gamma)
+    log_A_Astar = math.log(A_Astar)
+    def f(Mach_number):
+        return _log_area_ratio(float(Mach_number), constants)-log_A_Astar
+
+    # Ensure that f(lower_mach_boudary) and f(higher_mach_boundary) have opposite signs.
+    # That ensures that a root exists in the interval.
+    if branch == "Subsonic":
+        lower_mach_boudary = 1e-12
+        higher_mach_boundary = 1 - 1e-12
+    else:
+        # A/A* > ((gamma-1)/(gamma+1))^n*M^(2n-1) for every M, so the M where that bound equals A/A*
+        # lies above the supersonic root. Solved in logs to avoid overflow for large A/A*.
+        lower_mach_boudary = 1+1e-12
+        log_higher_mach_boundary = (log_A_Astar-constants.exp_area*math.log(constants.gm1/constants.gp1))/(2*constants.exp_area-1)
+        # For large gamma 2n-1 is small, and the bound can be past the float range.
+        if log_higher_mach_boundary > _LOG_FLOAT_MAX:
+            raise RuntimeError("Could not bracket root. Try larger higher_mach_boundary value. Iterate and re-run.")
+        higher_mach_boundary = math.exp(log_higher_mach_boundary)
+
+    # Continuation: in a sweep the last converged Mach for this (gamma, branch) is a good start.
+    # Try a narrow bracket around it first and fall back to the wide bracket if it misses.
+    previous_gamma, previous_mach = _last_M_by_branch.get(branch, (None, None))
+    warm_bracket = False
+    if previous_gamma == gamma:
+        warm_lower_mach = max(lower_mach_boudary, 0.5*previous_mach)
+        warm_higher_mach = 2*previous_mach if branch == "Supersonic" else min(higher_mach_boundary, 2*previous_mach)
+        f_warm_lower_mach = f(warm_lower_mach)
+        f_warm_higher_mach = f(warm_higher_mach)
+        if f_warm_lower_mach*f_warm_higher_mach <= 0:
+            lower_mach_boudary, f_lower_mach_boudary = warm_lower_mach, f_warm_lower_mach
+            higher_mach_boundary, f_higher_mach_boundary = warm_higher_mach, f_warm_higher_mach
+            warm_bracket = True
+
+    if not warm_bracket:
+        f_lower_mach_boudary = f(lower_mach_boudary)
+        f_higher_mach_boundary = f(higher_mach_boundary)
+
+        # If rounding defeats the analytic bound, expand the higher_mach_boundary so that it will bracket correctly.
+        if branch == "Supersonic" and f_lower_mach_boudary*f_higher_mach_boundary > 0:
+            for _ in range(20):
+                higher_mach_boundary *= 2
+                if math.isinf(higher_mach_boundary):
+                    raise RuntimeError("Could not bracket root. Try larger higher_mach_boundary value. Iterate and re-run.")
+                f_higher_mach_boundary = f(higher_mach_boundary)
+                if f_lower_mach_boudary * f_higher_mach_boundary <= 0:
+                    break
+            else:
+                raise RuntimeError("Could not bracket root. Try larger higher_mach_boundary value. Iterate and re-run.")
+
+        if branch == "Subsonic" and f_lower_mach_boudary*f_higher_mach_boundary > 0:
+            raise RuntimeError("Could not bracket Subsonic root. Iterate and re-run.")
+
+    # Starting guess for Newton. For large supersonic area ratios M ~ sqrt(2*ln(A/A*)) is closer than M = 2.
+    if M_guess is not None:
+        middle_mach = float(M_guess)
+    elif warm_bracket:
+        middle_mach = previous_mach
+    elif branch == "Subsonic":
+        middle_mach = 0.5
+    else:
+        middle_mach = max(2.0, math.sqrt(2*math.log(A_Astar)))
+    middle_mach = min(max(middle_mach, lower_mach_boudary), higher_mach_boundary)
+
+    Mach_number, converged = _mach_from_area_njit(
+        float(A_Astar), constants, branch == "Supersonic", float(lower_mach_boudary), float(higher_mach_boundary), float(middle_mach), float(tol), int(max_iter)
+    )
+    if not converged:
+        raise RuntimeError("Newton-bisection did not converge within max_iter. Iterate and re-run.")
+
+    _last_M_by_branch[branch] = (gamma, Mach_number)
+    return Mach_number
+
+def use_numba():
+    """
+    Compile the solver kernels with Numba so long sweeps of mach_area_relation run as native code.
+    Numba is optional and loads NumPy, so the kernels stay plain Python until this is called.
+    Compiled kernels are cached on disk, but the Numba import itself still costs a few hundred ms per process.
+    Returns True if the kernels are compiled, False if Numba is not installed.
+    """
+    global _numba_enabled
+    if _numba_enabled:
+        return True
+    try:
+        from numba import njit
+    except ImportError:
+        return False
+
+    # The kernels call each other through module globals, so replacing them here is enough for the
+    # compiled callers to pick up the compiled callees.
+    module_globals = globals()
+    for name in _KERNEL_NAMES:
+        module_globals[name] = njit(cache=True, fastmath=True)(module_globals[name])
+    _numba_enabled = True
+    return True
@@ -2,12 +2,61 @@
 This file calculates nozzle geometry with isentropic flow relations. It can find the mach exit number, exit pressure ratio, exit temperature ratio
 and ideal thrust coefficient (C_F).
 
-This file calls values from flow_relations.py.
+This file calls values from flow_relations_core.py, so it does not need NumPy.
 """
 
-import numpy as np
+import bisect
+import functools
+import math
 
-from flow_relations import (mach_area_relation, pressure_mach_relation, temperature_mach_relation,)
+from flow_relations_core import (area_ratio_relation, gamma_constants, mach_area_relation,)
+
+# Supersonic Ae/At -> Me tables for common gamma values, built on first use.
+_TABLE_GAMMAS = (1.2, 1.3, 1.4, 1.67)
+_ME_TABLES = {}
+
+def _table_mach_guess(Ae_At, gamma, branch):
+    # Interpolate Me from the table, or return None for off-table gamma, Subsonic, or Ae/At past the grid.
+    if branch != "Supersonic" or gamma not in _TABLE_GAMMAS:
+        return None
+    if gamma not in _ME_TABLES:
+        # 64 points with M-1 log-spaced from 1e-3 to 19, dense near the throat where A/A* is flat. The guess is
+        # within a few percent, and building a finer table would cost more than the Newton steps it saves.
+        M_grid = [1+1e-3*(19/1e-3)**(i/63) for i in range(64)]
+        _ME_TABLES[gamma] = ([area_ratio_relation(M, gamma) for M in M_grid], M_grid)
+    A_grid, M_grid = _ME_TABLES[gamma]
+    if not (A_grid[0] <= Ae_At <= A_grid[-1]):
+        return None
+
+    # Binary search for the grid cell, then interpolate linearly inside it.
+    i = max(bisect.bisect_left(A_grid, Ae_At), 1)
+    weight = (Ae_At-A_grid[i-1])/(A_grid[i]-A_grid[i-1])
+    return M_grid[i-1]+weight*(M_grid[i]-M_grid[i-1])
+
+@functools.lru_cache(maxsize=256)
+def _exit_state(Ae_At, gamma, branch, tol, max_iter):
+    # Cached Ae/At -> (Me, pe/p0, Te/T0) so repeated geometries skip the root-find.
+    # The table guess is polished by Newton so the result still meets tol.
+    M_guess = _table_mach_guess(Ae_At, gamma, branch)
+    Mach_exit = float(mach_area_relation(Ae_At, gamma, branch=branch, tol=tol, max_iter=max_iter, M_guess=M_guess))
+
+    # pe/p0 = t^(-gamma/(gamma-1)) and Te/T0 = 1/t share t = 1+(gamma-1)/2*Me^2.
+    constants = gamma_constants(gamma)
+    t = 1+constants.half_gm1*Mach_exit*Mach_exit
+    pe_p0 = t**constants.exp_press
+    Te_T0 = 1/t
+    return Mach_exit, pe_p0, Te_T0
+
+def _thrust_coefficient(constants, pe_p0, pa_p0, Ae_At):
+    # Unchecked CF using the precomputed gamma constants.
+    momentum = math.sqrt(constants.coeff_thrust*(1-math.pow(pe_p0, constants.exp_thrust)))
+    pressure = (pe_p0-pa_p0)*Ae_At
+    return float(momentum+pressure)
+
+def _solve_nozzle(gamma, Ae_At, pa_p0, branch, tol, max_iter):
+    # Ae/At -> (Me, pe/p0, Te/T0, CF) in one pass, with no dict building in between.
+    Mach_exit, pe_p0, Te_T0 = _exit_state(float(Ae_At), float(gamma), branch, tol, max_iter)
+    return Mach_exit, pe_p0, Te_T0, _thrust_coefficient(gamma_constants(gamma), pe_p0, pa_p0, Ae_At)
 
 def exit_area_relation(Ae_At, gamma, branch="Supersonic", tol=1e-10, max_iter=200):
     # Calculate the exit conditions when given Ae/At and gamma.
@@ -17,13 +66,12 @@ def exit_area_relation(Ae_At, gamma, branch="Supersonic", tol=1e-10, max_iter=20
     if gamma <= 1:
         raise ValueError("gamma must be > 1. Iterate and re-run.")
 
-    Mach_exit = mach_area_relation(Ae_At, gamma, branch=branch, tol=tol, max_iter=max_iter)
-    pe_p0 = float(pressure_mach_relation(Mach_exit, gamma))
-    Te_T0 = float(temperature_mach_relation(Mach_exit, gamma))
+    Mach_exit, pe_p0, Te_T0 = _exit_state(float(Ae_At), float(gamma), branch, tol, max_iter)
 
+    # A new dict every call so callers can't modify the cached state.
     return {
         "Ae_At": float(Ae_At),
-        "Mach_exit": float(Mach_exit),
+        "Mach_exit": Mach_exit,
         "pe_p0": pe_p0,
         "Te_T0": Te_T0,
     }
@@ -39,12 +87,47 @@ def thrust_coefficient_CF(gamma, pe_p0, pa_p0, Ae_At):
     if Ae_At < 1:
         raise ValueError("Ae/At must be >= 1. Iterate and re-run.")
 
-    coefficient = (2*gamma**2/(gamma-1))*(2/(gamma+1))**((gamma+1)/(gamma-1))
-    momentum = np.sqrt(coefficient*(1-pe_p0**((gamma-1)/gamma)))
-    pressure = (pe_p0-pa_p0)*Ae_At
-    return float(momentum+pressure)
+    return _thrust_coefficient(gamma_constants(gamma), pe_p0, pa_p0, Ae_At)
 
-def C_F_from_geometry(gamma, Ae_At, pa_p0, branch="Supersonic", tol=1e-10, max_iter=200):
+def C_F_from_geometry(gamma, Ae_At, pa_p0, branch="Supersonic", tol=1e-10, max_iter=200, exit_conditions=None):
     # Ae/At -> Me -> pe/p0 -> CF
-    exit_conditions = exit_area_relation(Ae_At, gamma, branch=branch, tol=tol, max_iter=max_iter)
-    return thrust_coefficient_CF(gamma, exit_conditions["pe_p0"], pa_p0, Ae_At)
\ No newline at end of file
+    # exit_conditions from exit_area_relation can be passed in to reuse an existing solve.
+    if exit_conditions is not None:
+        return thrust_coefficient_CF(gamma, exit_conditions["pe_p0"], pa_p0, Ae_At)
+
+    if Ae_At < 1:
+        raise ValueError("Ae/At must be >= 1. Iterate and re-run.")
+    if gamma <= 1:
+        raise ValueError("gamma must be > 1. Iterate and re-run.")
+    if not (0 <= pa_p0 < 1):
+        raise ValueError("pa_p0 must be in [0, 1). Iterate and re-run.")
+
+    _, _, _, C_F = _solve_nozzle(gamma, Ae_At, pa_p0, branch, tol, max_iter)
+    return C_F
+
+def C_F_batch(gammas, Ae_Ats, pa_p0s, branch="Supersonic", tol=None, max_iter=200, xp=None, dtype="float32"):
+    # Vectorized C_F_from_geometry for parameter sweeps. gammas, Ae_Ats and pa_p0s are broadcast together.
+    # xp is the array module, NumPy by default. Passing cupy keeps the whole sweep on the GPU, which pays off
+    # above roughly 1e5 grid points.
+    # dtype defaults to float32, accurate to about 1e-5, which halves memory traffic. Pass "float64" for full precision.
+    # NumPy is only imported here so the scalar CLI path does not load it.
+    from flow_relations import mach_area_relation_batch
+
+    if xp is None:
+        import numpy as xp
+
+    gamma, Ae_At, pa_p0 = xp.broadcast_arrays(
+        xp.asarray(gammas, dtype=dtype), xp.asarray(Ae_Ats, dtype=dtype), xp.asarray(pa_p0s, dtype=dtype)
+    )
+    if xp.any((pa_p0 < 0) | (pa_p0 >= 1)):
+        raise ValueError("pa_p0 must be in [0, 1). Iterate and re-run.")
+
+    Mach_exit = mach_area_relation_batch(Ae_At, gamma, branch=branch, tol=tol, max_iter=max_iter, xp=xp, dtype=dtype)
+
+    gamma_minus_one = gamma-1
+    gamma_plus_one = gamma+1
+    pe_p0 = (1+0.5*gamma_minus_one*Mach_exit**2)**(-gamma/gamma_minus_one)
+    coefficient = (2*gamma**2/gamma_minus_one)*(2/gamma_plus_one)**(gamma_plus_one/gamma_minus_one)
+    momentum = xp.sqrt(coefficient*(1-pe_p0**(gamma_minus_one/gamma)))
+    pressure = (pe_p0-pa_p0)*Ae_At
+    return momentum+pressure
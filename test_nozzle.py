@@ -11,22 +11,37 @@ Covers:
 5) Expansion regime classification behaves as expected
 """
 
+import importlib.util
 import math
+import subprocess
+import sys
+import warnings
+
 import pytest
 
 from flow_relations import (
     area_ratio_relation,
     mach_area_relation,
+    mach_area_relation_batch,
+    gamma_constants,
     pressure_mach_relation,
     temperature_mach_relation,
 )
 
+from flow_relations_core import (
+    _fixed_point_step,
+    _last_M_by_branch,
+    _log_area_and_slope,
+    use_numba,
+)
+
 from nozzle_geometry import (
     exit_area_relation,
+    C_F_batch,
     C_F_from_geometry,
 )
 
-from command_control import expansion_ratio
+from command_control import C_F_warning, expansion_ratio
 
 
 # -----------------------------
@@ -51,6 +66,89 @@ def test_area_mach_inversion_subsonic():
     assert abs(M_solved - M_true) < 1e-8
 
 
+def test_area_mach_inversion_large_area_ratio():
+    gamma = 1.4
+    M_true = 500.0
+    A = float(area_ratio_relation(M_true, gamma))
+
+    M_solved = mach_area_relation(A, gamma, branch="Supersonic", tol=1e-12)
+    assert abs(M_solved - M_true) < 1e-8*M_true
+
+
+def test_area_mach_inversion_gamma_near_one():
+    # n = (gamma+1)/(2(gamma-1)) is in the thousands here, so A/A* overflows a float inside the bracket.
+    for gamma, A in [(1.0005, 1.5), (1.0005, 10.0), (1.0005, 100.0), (1.0002, 10.0)]:
+        M_solved = mach_area_relation(A, gamma, branch="Supersonic", tol=1e-12)
+        assert float(area_ratio_relation(M_solved, gamma)) == pytest.approx(A, rel=1e-8)
+
+    assert mach_area_relation(10.0, 1.0005) == pytest.approx(2.765, abs=1e-3)
+
+
+def test_supersonic_huge_area_ratio():
+    # For gamma = 3, A/A* = M/2 for large M, so M = 2e300 where 1+(gamma-1)/2*M^2 overflows a float.
+    assert mach_area_relation(1e300, 3.0, branch="Supersonic") == pytest.approx(2e300, rel=1e-10)
+
+    # For gamma = 10 the supersonic root of A/A* = 1e100 is near M = 1e450, past the float range.
+    with pytest.raises(RuntimeError):
+        mach_area_relation(1e100, 10.0, branch="Supersonic")
+
+
+def test_area_derivative_matches_finite_difference():
+    gamma = 1.4
+    M = 2.5
+    h = 1e-6
+    log_A, slope = _log_area_and_slope(M, gamma_constants(gamma))
+    finite_difference = (math.log(area_ratio_relation(M+h, gamma))-math.log(area_ratio_relation(M-h, gamma)))/(2*h)
+
+    assert log_A == pytest.approx(math.log(area_ratio_relation(M, gamma)))
+    assert slope == pytest.approx(finite_difference, rel=1e-6)
+
+
+def test_fixed_point_step_has_root_as_fixed_point():
+    gamma = 1.4
+    for M_true, supersonic in [(0.3, False), (2.0, True)]:
+        A = float(area_ratio_relation(M_true, gamma))
+        M_next, delta = _fixed_point_step(M_true, A, gamma_constants(gamma), supersonic)
+
+        assert M_next == pytest.approx(M_true, rel=1e-12)
+        assert 0.0 < delta < 0.5
+
+
+def test_warm_start_sweep_matches_true_mach():
+    gamma = 1.3
+    # Nearby targets reuse the warm bracket, the last one falls outside it.
+    for M_true in [2.0, 2.05, 2.1, 9.0, 1.2]:
+        A = float(area_ratio_relation(M_true, gamma))
+        M_solved = mach_area_relation(A, gamma, branch="Supersonic", tol=1e-12)
+        assert abs(M_solved - M_true) < 1e-8
+
+
+def test_solver_converges_superlinearly():
+    # Plain bisection needs about 40 iterations for tol=1e-12; the safeguarded solver needs at most 12 here.
+    for gamma in [1.1, 1.4, 1.67]:
+        for M_true in [0.05, 0.5, 0.99, 1.01, 2.0, 10.0, 100.0]:
+            _last_M_by_branch.clear()
+            A = float(area_ratio_relation(M_true, gamma))
+            branch = "Subsonic" if M_true < 1 else "Supersonic"
+            M_solved = mach_area_relation(A, gamma, branch=branch, tol=1e-12, max_iter=15)
+            assert abs(M_solved - M_true) < 1e-8*max(1.0, M_true)
+
+
+def test_solver_reports_no_convergence():
+    with pytest.raises(RuntimeError):
+        mach_area_relation(10.0, 1.25, branch="Supersonic", tol=1e-14, max_iter=1)
+
+
+@pytest.mark.skipif(importlib.util.find_spec("numba") is None, reason="Numba is not installed")
+def test_numba_kernels_match_python():
+    cases = [(A, gamma, branch) for gamma in [1.2, 1.4] for A in [1.5, 10.0] for branch in ["Subsonic", "Supersonic"]]
+    M_python = [mach_area_relation(A, gamma, branch=branch, tol=1e-12) for A, gamma, branch in cases]
+
+    assert use_numba()
+    M_compiled = [mach_area_relation(A, gamma, branch=branch, tol=1e-12) for A, gamma, branch in cases]
+    assert M_compiled == pytest.approx(M_python, rel=1e-10)
+
+
 # -----------------------------
 # Isentropic ratios behavior
 # -----------------------------
@@ -63,6 +161,20 @@ def test_pressure_ratio_monotonic():
     assert p2 < p1, "Expected p/p0 to decrease as Mach increases"
 
 
+def test_relations_array_matches_scalar():
+    gamma = 1.4
+    machs = [0.5, 1.0, 2.0, 3.5]
+
+    areas = area_ratio_relation(machs, gamma)
+    pressures = pressure_mach_relation(machs, gamma)
+    temperatures = temperature_mach_relation(machs, gamma)
+
+    for i, M in enumerate(machs):
+        assert areas[i] == pytest.approx(area_ratio_relation(M, gamma))
+        assert pressures[i] == pytest.approx(pressure_mach_relation(M, gamma))
+        assert temperatures[i] == pytest.approx(temperature_mach_relation(M, gamma))
+
+
 def test_temperature_ratio_in_range():
     gamma = 1.4
     T = float(temperature_mach_relation(2.0, gamma))
@@ -96,6 +208,83 @@ def test_thrust_coefficient_reasonable():
     assert C_F > 0.0
 
 
+def test_table_gamma_matches_direct_solve():
+    gamma = 1.4
+    Ae_At = 25.0
+
+    st = exit_area_relation(Ae_At, gamma, branch="Supersonic", tol=1e-12)
+    M_direct = mach_area_relation(Ae_At, gamma, branch="Supersonic", tol=1e-12)
+
+    assert abs(st["Mach_exit"] - M_direct) < 1e-10
+
+
+def test_exit_state_cached_copy():
+    gamma = 1.4
+    Ae_At = 10.0
+
+    st1 = exit_area_relation(Ae_At, gamma, branch="Supersonic")
+    st1["Mach_exit"] = -1.0
+    st2 = exit_area_relation(Ae_At, gamma, branch="Supersonic")
+
+    assert st2["Mach_exit"] > 1.0
+    assert C_F_from_geometry(gamma, Ae_At, 0.02, exit_conditions=st2) == pytest.approx(C_F_from_geometry(gamma, Ae_At, 0.02))
+
+
+def test_C_F_batch_matches_scalar():
+    gammas = [[1.2], [1.4]]
+    Ae_Ats = [1.0, 2.0, 10.0, 50.0]
+    pa_p0 = 0.01
+
+    C_F_single = C_F_batch(gammas, Ae_Ats, pa_p0)
+    C_F_double = C_F_batch(gammas, Ae_Ats, pa_p0, dtype="float64")
+
+    assert C_F_single.shape == (2, 4)
+    assert C_F_single.dtype.name == "float32"
+    for i, gamma in enumerate([1.2, 1.4]):
+        for j, Ae_At in enumerate(Ae_Ats):
+            C_F = C_F_from_geometry(gamma, Ae_At, pa_p0)
+            assert C_F_single[i, j] == pytest.approx(C_F, rel=1e-4)
+            assert C_F_double[i, j] == pytest.approx(C_F, rel=1e-8)
+
+
+def test_batch_gamma_near_one_does_not_overflow():
+    # n = (gamma+1)/(2(gamma-1)) is about 2000, so A/A* itself overflows inside the supersonic bracket.
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        M_single = mach_area_relation_batch([1.5, 10.0], 1.0005)
+        M_double = mach_area_relation_batch([1.5, 10.0], 1.0005, dtype="float64")
+
+    for i, A in enumerate([1.5, 10.0]):
+        M = mach_area_relation(A, 1.0005, tol=1e-12)
+        assert M_single[i] == pytest.approx(M, rel=1e-4)
+        assert M_double[i] == pytest.approx(M, rel=1e-8)
+
+
+def test_batch_reports_no_bracket():
+    # The subsonic bracket starts at M = 1e-12, where A/A* is about 6e11, so A/A* = 1e13 has no root in it.
+    for dtype in ["float32", "float64"]:
+        with pytest.raises(RuntimeError):
+            mach_area_relation_batch([2.0, 1e13], 1.4, branch="Subsonic", dtype=dtype)
+
+
+def test_batch_subsonic_large_area_ratio_is_relative():
+    # M is about 6e-5 here, so an absolute float32 tolerance of 1e-5 would leave only one significant figure.
+    A_Astars = [100.0, 1e4]
+    M_single = mach_area_relation_batch(A_Astars, 1.4, branch="Subsonic")
+
+    for i, A in enumerate(A_Astars):
+        assert M_single[i] == pytest.approx(mach_area_relation(A, 1.4, branch="Subsonic", tol=1e-14), rel=1e-4)
+
+
+def test_cli_import_does_not_load_numpy():
+    # Numba imports NumPy, so the CLI must not load either one.
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, command_control; print('numpy' in sys.modules, 'numba' in sys.modules)"],
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "False False"
+
+
 # -----------------------------
 # Expansion regime classification
 # -----------------------------
@@ -113,3 +302,9 @@ def test_overexpanded_classification():
 def test_ideally_expanded_classification():
     regime, _ = expansion_ratio(pe_p0=0.051, pa_p0=0.05, rtol=0.05)
     assert regime == "ideally-expanded"
+
+
+def test_C_F_warning_flags_unusual_values():
+    assert C_F_warning(1.5) is None
+    assert C_F_warning(-0.1) is not None
+    assert C_F_warning(6.0) is not None